@@ -1,23 +1,56 @@
 import argparse
+import asyncio
 import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
 import time
 import json
 import csv
-import statistics
 from datetime import datetime
+from functools import lru_cache
 from colorama import Fore, Style, init
 import concurrent.futures
-import threading
+import socket
+import errno
+import os
 import sys
+from urllib.parse import urlsplit
 import numpy as np
-import matplotlib.pyplot as plt
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import liburing
+except ImportError:
+    liburing = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Initialize colorama
 init(autoreset=True)
 
-# Global variables for storing results
+TABLE_HEADER = ("| Request | Status | Limit | Remain | Reset Time           | Period | Retry | Response |\n"
+                "|---------|--------|-------|--------|---------------------|--------|-------|----------|\n")
+
+# Complete table row templates, chosen per row by status code
+ROW_FORMAT = "| {:<7} | {:<6} | {:<5} | {:<6} | {:<19} | {:<6} | {:<5} | {:.0f}ms |" + Style.RESET_ALL
+ROW_OK = Fore.GREEN + ROW_FORMAT
+ROW_BAD = Fore.RED + ROW_FORMAT
+
+# Global variables for storing results, indexed by request_num - 1 and sized in main()
+# Failed requests leave their slot as None in results and -1 in status_codes
 results = []
-result_lock = threading.Lock()
+response_times = np.empty(0, dtype=np.float64)
+status_codes = np.empty(0, dtype=np.int32)
+
+# io_uring operations, packed into the low bits of each SQE's user_data
+URING_CONNECT, URING_SEND, URING_RECV, URING_CANCEL = range(4)
 
 def parse_arguments():
     parser = argparse.ArgumentParser(description="Test rate limiting on a URL")
@@ -30,6 +63,10 @@ def parse_arguments():
     parser.add_argument("-t", "--timeout", type=float, default=30, help="Request timeout in seconds")
     parser.add_argument("-L", "--follow-redirects", action="store_true", help="Follow redirects")
     parser.add_argument("-c", "--concurrency", type=int, default=10, help="Number of concurrent requests")
+    parser.add_argument("--backend", choices=["asyncio", "threads", "io_uring"], default="asyncio", help="Request backend: asyncio (aiohttp event loop), threads (requests thread pool) or io_uring (Linux, plain HTTP only)")
+    parser.add_argument("--sqpoll", action="store_true", help="Use a kernel submission polling thread with the io_uring backend")
+    parser.add_argument("--defer-output", action=argparse.BooleanOptionalAction, default=None, help="Print result rows in one write after all requests finish (default: on for table format)")
+    parser.add_argument("--graph", action=argparse.BooleanOptionalAction, default=True, help="Save a response time and status code graph to rate_limit_test_results.png")
     parser.add_argument("--help-tags", action="store_true", help="Display help for output tags")
     parser.add_argument("--json-output", help="Output results to a JSON file")
     parser.add_argument("--csv-output", help="Output results to a CSV file")
@@ -56,29 +93,55 @@ def parse_headers(headers):
     retry_after = headers.get("Retry-After")
     return limit, remaining, reset, period, retry_after
 
+# Reset timestamps repeat for a whole rate limit window, so each distinct value is only formatted once
+@lru_cache(maxsize=256)
 def format_date(timestamp):
     if timestamp and timestamp != "null":
         try:
-            return datetime.fromtimestamp(float(timestamp)).strftime("%Y-%m-%d %H:%M:%S")
+            return datetime.fromtimestamp(float(timestamp)).isoformat(sep=" ", timespec="seconds")
         except ValueError:
             return "Invalid date"
     return "N/A"
 
 def display_table(request_num, status_code, limit, remaining, reset, period, retry_after, response_time):
-    color = Fore.RED if status_code == 429 else Fore.GREEN
-    print(color + f"| {request_num:<7} | {status_code:<6} | {limit or 'N/A':<5} | {remaining or 'N/A':<6} | {format_date(reset):<19} | {period or 'N/A':<6} | {retry_after or 'N/A':<5} | {response_time:.0f}ms |")
+    return (ROW_BAD if status_code == 429 else ROW_OK).format(request_num, status_code, limit or 'N/A', remaining or 'N/A', format_date(reset),
+                                                             period or 'N/A', retry_after or 'N/A', response_time)
 
 def display_csv(request_num, status_code, limit, remaining, reset, period, retry_after, response_time):
     return f"{request_num},{status_code},{limit or 'N/A'},{remaining or 'N/A'},{format_date(reset)},{period or 'N/A'},{retry_after or 'N/A'},{response_time:.0f}"
 
+def select_emitter(output_format, defer_output):
+    # Resolved once in main() and passed down so record_result does not branch on the format per request.
+    # Deferred rows are printed by main() once every request has finished.
+    if defer_output:
+        return lambda *row: None
+    return {
+        "table": lambda *row: print(display_table(*row)),
+        "csv": lambda *row: print(display_csv(*row)),
+        "json": lambda *row: None
+    }[output_format]
+
+def display_results(args, rows):
+    # Format every row on the main thread and emit them with a single write. The table header is
+    # written here too, so verbose dumps and failure messages printed during the run come before it.
+    row_format = display_table if args.format == "table" else display_csv
+    sys.stdout.write((TABLE_HEADER if args.format == "table" else "") + "".join(row_format(row["request_num"], row["status_code"], row["limit"], row["remaining"], row["reset"],
+                                        row["period"], row["retry_after"], row["response_time"]) + "\n" for row in rows))
+    sys.stdout.flush()
+
 def calculate_statistics(times, codes):
-    success_count = sum(1 for code in codes if 200 <= code < 300)
-    success_rate = (success_count / len(codes)) * 100
+    # All statistics are NumPy reductions over one float64 buffer. np.median/np.percentile
+    # interpolate linearly and propagate NaN; response times are never NaN, so results match the statistics module.
+    arr = np.asarray(times, dtype=np.float64)
+    codes_arr = np.asarray(codes, dtype=np.int32)
+
+    success_count = int(((codes_arr >= 200) & (codes_arr < 300)).sum())
+    success_rate = (success_count / len(codes_arr)) * 100
 
-    mean_time = statistics.mean(times)
-    median_time = statistics.median(times)
-    std_dev = statistics.stdev(times) if len(times) > 1 else 0
-    percentiles = np.percentile(times, [50, 75, 90, 95, 99])
+    mean_time = arr.mean()
+    median_time = np.median(arr)
+    std_dev = arr.std(ddof=1) if len(arr) > 1 else 0
+    percentiles = np.percentile(arr, [50, 75, 90, 95, 99])
 
     print(f"\n{Fore.BLUE}Statistical Analysis:{Style.RESET_ALL}")
     print(f"  Mean Response Time: {mean_time:.2f}ms")
@@ -95,24 +158,17 @@ def calculate_statistics(times, codes):
 
 def generate_chart(times, codes):
     max_height = 20
-    width = len(times)
-    max_time = max(times)
-
-    chart = []
-    for i in range(max_height):
-        row = []
-        for j in range(width):
-            if codes[j] == 200:
-                if (max_height - i) <= (times[j] * max_height / max_time):
-                    row.append("█")
-                else:
-                    row.append(" ")
-            else:
-                if (max_height - i) <= 1:
-                    row.append("▄")
-                else:
-                    row.append(" ")
-        chart.append("".join(row))
+    times_arr = np.asarray(times, dtype=np.float64)
+    codes_arr = np.asarray(codes)
+    width = len(times_arr)
+
+    # Build the whole grid at once: row i of a successful request is filled when (max_height - i) <= its scaled time
+    heights = np.clip(np.floor(times_arr * max_height / times_arr.max()).astype(np.int32), 0, max_height)
+    success = (codes_arr == 200)[None, :]
+    row_idx = np.arange(max_height)[:, None]
+    cells = np.where(success & (row_idx >= max_height - heights[None, :]), "█",
+                     np.where(~success & (row_idx >= max_height - 1), "▄", " "))
+    chart = ["".join(row) for row in cells]
 
     print(f"\n{Fore.BLUE}Request Visualization:{Style.RESET_ALL}")
     for row in chart:
@@ -120,12 +176,22 @@ def generate_chart(times, codes):
     print("-" * width)
     print("Success (█) vs Rate Limited (▄)")
 
-def generate_graph(times, codes, percentiles):
+def generate_graph(times, percentiles, unique_codes, code_counts):
+    # matplotlib is imported here so runs with --no-graph never pay for it
+    import matplotlib
+    matplotlib.use("Agg")  # Graphs are only saved to disk, so skip interactive backend setup
+    import matplotlib.pyplot as plt
+
+    times_arr = np.asarray(times, dtype=np.float64)
+    max_time = times_arr.max()
+
     plt.figure(figsize=(15, 10))
 
     # Response time distribution
     plt.subplot(2, 1, 1)
-    plt.hist(times, bins=50, edgecolor='black', alpha=0.7)
+    counts, edges = np.histogram(times_arr, bins=50)
+    centers = (edges[:-1] + edges[1:]) / 2
+    plt.bar(centers, counts, width=edges[1] - edges[0], edgecolor='black', alpha=0.7)
     plt.title('Response Time Distribution', fontsize=16)
     plt.xlabel('Response Time (ms)', fontsize=12)
     plt.ylabel('Frequency', fontsize=12)
@@ -133,7 +199,7 @@ def generate_graph(times, codes, percentiles):
     # Add vertical lines for percentiles and max outlier
     colors = ['r', 'g', 'b', 'c', 'm', 'y']
     labels = ['50th', '75th', '90th', '95th', '99th', 'Max']
-    all_percentiles = list(percentiles) + [max(times)]
+    all_percentiles = list(percentiles) + [max_time]
 
     for i, percentile in enumerate(all_percentiles):
         plt.axvline(percentile, color=colors[i], linestyle='dashed', linewidth=2,
@@ -143,12 +209,11 @@ def generate_graph(times, codes, percentiles):
     plt.grid(True, linestyle='--', alpha=0.7)
 
     # Adjust x-axis to show the full range including the max outlier
-    plt.xlim(0, max(times) * 1.05)  # Add 5% padding to the right
+    plt.xlim(0, max_time * 1.05)  # Add 5% padding to the right
 
     # Status code distribution
     plt.subplot(2, 1, 2)
-    status_counts = {code: codes.count(code) for code in set(codes)}
-    bars = plt.bar(status_counts.keys(), status_counts.values(), edgecolor='black')
+    bars = plt.bar(unique_codes.astype(str), code_counts, edgecolor='black')
     plt.title('Status Code Distribution', fontsize=16)
     plt.xlabel('Status Code', fontsize=12)
     plt.ylabel('Count', fontsize=12)
@@ -165,13 +230,19 @@ def generate_graph(times, codes, percentiles):
     # Adjust layout and save
     plt.tight_layout()
     plt.savefig('rate_limit_test_results.png', dpi=300)
-    print(f"\n{Fore.BLUE}Graph saved as rate_limit_test_results.png{Style.RESET_ALL}")
+    plt.close()
+
+def display_summary(times, codes, unique_codes, code_counts):
+    times_arr = np.asarray(times, dtype=np.float64)
+    codes_arr = np.asarray(codes, dtype=np.int32)
+
+    status_counts = dict(zip(unique_codes.tolist(), code_counts.tolist()))
 
     # Display additional statistics
-    total_requests = len(codes)
-    success_count = codes.count(200)
+    total_requests = len(codes_arr)
+    success_count = status_counts.get(200, 0)
     success_rate = (success_count / total_requests) * 100
-    rate_limited = codes.count(429)
+    rate_limited = status_counts.get(429, 0)
 
     print(f"\n{Fore.BLUE}Additional Statistics:{Style.RESET_ALL}")
     print(f"  Total Requests: {total_requests}")
@@ -183,29 +254,26 @@ def generate_graph(times, codes, percentiles):
             print(f"    {code}: {count} ({(count/total_requests)*100:.2f}%)")
 
     # Calculate and display average response times
-    success_times = [t for t, c in zip(times, codes) if c == 200]
-    rate_limited_times = [t for t, c in zip(times, codes) if c == 429]
+    success_times = times_arr[codes_arr == 200]
+    rate_limited_times = times_arr[codes_arr == 429]
 
     print(f"\n{Fore.BLUE}Response Time Statistics:{Style.RESET_ALL}")
-    print(f"  All Requests: Avg = {sum(times) / len(times):.2f}ms, Max = {max(times):.2f}ms")
-    if success_times:
-        print(f"  Successful Requests: Avg = {sum(success_times) / len(success_times):.2f}ms, Max = {max(success_times):.2f}ms")
-    if rate_limited_times:
-        print(f"  Rate Limited Requests: Avg = {sum(rate_limited_times) / len(rate_limited_times):.2f}ms, Max = {max(rate_limited_times):.2f}ms")
-
-def make_request(args, headers, request_num):
-    start_time = time.time()
-    try:
-        response = requests.get(args.url, headers=headers, timeout=args.timeout, allow_redirects=args.follow_redirects)
-    except requests.RequestException as e:
-        print(f"Request {request_num} failed: {e}")
-        return None
-
-    end_time = time.time()
-    response_time = (end_time - start_time) * 1000  # Convert to milliseconds
-
-    status_code = response.status_code
-    limit, remaining, reset, period, retry_after = parse_headers(response.headers)
+    print(f"  All Requests: Avg = {times_arr.mean():.2f}ms, Max = {times_arr.max():.2f}ms")
+    if success_times.size:
+        print(f"  Successful Requests: Avg = {success_times.mean():.2f}ms, Max = {success_times.max():.2f}ms")
+    if rate_limited_times.size:
+        print(f"  Rate Limited Requests: Avg = {rate_limited_times.mean():.2f}ms, Max = {rate_limited_times.max():.2f}ms")
+
+def create_session(args):
+    # One pooled session shared by all workers so connections (and TLS handshakes) are reused
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=args.concurrency, pool_maxsize=args.concurrency, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def record_result(emit, request_num, status_code, response_headers, response_time):
+    limit, remaining, reset, period, retry_after = parse_headers(response_headers)
 
     result = {
         "request_num": request_num,
@@ -218,28 +286,355 @@ def make_request(args, headers, request_num):
         "response_time": response_time
     }
 
-    with result_lock:
-        results.append(result)
+    # Each request owns its slot, so these writes need no lock
+    results[request_num - 1] = result
+    response_times[request_num - 1] = response_time
+    status_codes[request_num - 1] = status_code
+
+    emit(request_num, status_code, limit, remaining, reset, period, retry_after, response_time)
+
+    return result
+
+def is_json_response(response_headers):
+    # Prefix match so parameters such as "; charset=utf-8" still count as JSON
+    return response_headers.get('Content-Type', '').startswith('application/json')
+
+def display_verbose(request_num, response_headers, content):
+    print(f"\n{Fore.BLUE}Request {request_num} Details:{Style.RESET_ALL}")
+    print(f"{Fore.YELLOW}All Headers:{Style.RESET_ALL}")
+    for header, value in response_headers.items():
+        print(f"{header}: {value}")
+    print(f"{Fore.YELLOW}Response Body:{Style.RESET_ALL}")
+    print_body(response_headers, content)
+    print(f"{Fore.BLUE}------------------------{Style.RESET_ALL}")
+
+def print_body(response_headers, content):
+    if is_json_response(response_headers):
+        try:
+            data = load_json(content)
+        except ValueError:
+            pass  # Not actually JSON; print it as text below
+        else:
+            # Write the parsed body straight to stdout rather than formatting an intermediate string
+            dump_json(data, sys.stdout)
+            print()
+            return
+    # Responses are UTF-8 JSON or text, so decode directly instead of running charset detection
+    print(content.decode("utf-8", errors="replace"))
+
+def describe_error(e):
+    # Some exceptions, such as asyncio.TimeoutError, have an empty message
+    if isinstance(e, asyncio.TimeoutError):
+        return "timed out"
+    return str(e) or type(e).__name__
+
+def scheduled_start(start_time, args, request_num):
+    # Request n is due (n - 1) * delay seconds after the run starts, however many are already in flight
+    return start_time + (request_num - 1) * args.delay
+
+def make_request(session, args, headers, emit, request_num, start_time):
+    wait = scheduled_start(start_time, args, request_num) - time.monotonic()
+    if wait > 0:
+        time.sleep(wait)
+
+    start_ns = time.perf_counter_ns()
+    try:
+        response = session.get(args.url, headers=headers, timeout=args.timeout, allow_redirects=args.follow_redirects)
+    except requests.RequestException as e:
+        print(f"Request {request_num} failed: {e}")
+        return None
+
+    response_time = (time.perf_counter_ns() - start_ns) / 1_000_000  # Convert to milliseconds
 
-    if args.format == "table":
-        display_table(request_num, status_code, limit, remaining, reset, period, retry_after, response_time)
-    elif args.format == "csv":
-        print(display_csv(request_num, status_code, limit, remaining, reset, period, retry_after, response_time))
+    # Closing the response hands its connection back to the pool as soon as we are done with it
+    with response:
+        result = record_result(emit, request_num, response.status_code, response.headers, response_time)
+
+        if args.verbose:
+            display_verbose(request_num, response.headers, response.content)
+
+    return result
+
+async def make_request_async(session, semaphore, args, headers, emit, request_num, start_time):
+    wait = scheduled_start(start_time, args, request_num) - time.monotonic()
+    if wait > 0:
+        await asyncio.sleep(wait)
+
+    async with semaphore:
+        start_ns = time.perf_counter_ns()
+        try:
+            async with session.get(args.url, headers=headers, allow_redirects=args.follow_redirects) as response:
+                body = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Request {request_num} failed: {describe_error(e)}")
+            return None
+
+        response_time = (time.perf_counter_ns() - start_ns) / 1_000_000  # Convert to milliseconds
+
+    result = record_result(emit, request_num, response.status, response.headers, response_time)
 
     if args.verbose:
-        print(f"\n{Fore.BLUE}Request {request_num} Details:{Style.RESET_ALL}")
-        print(f"{Fore.YELLOW}All Headers:{Style.RESET_ALL}")
-        for header, value in response.headers.items():
-            print(f"{header}: {value}")
-        print(f"{Fore.YELLOW}Response Body:{Style.RESET_ALL}")
-        print(json.dumps(response.json(), indent=2) if response.headers.get('Content-Type') == 'application/json' else response.text)
-        print(f"{Fore.BLUE}------------------------{Style.RESET_ALL}")
+        display_verbose(request_num, response.headers, body)
 
     return result
 
+def run_threaded(args, headers, emit):
+    session = create_session(args)
+
+    with session, concurrent.futures.ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        # Everything is submitted up front; each worker waits for its own scheduled start
+        start_time = time.monotonic()
+        futures = [executor.submit(make_request, session, args, headers, emit, i, start_time) for i in range(1, args.requests + 1)]
+
+        concurrent.futures.wait(futures)
+
+async def run_all(args, headers, emit):
+    # All requests share one event loop; the semaphore and connector limit cap in-flight requests
+    semaphore = asyncio.Semaphore(args.concurrency)
+    connector = aiohttp.TCPConnector(limit=args.concurrency, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        start_time = time.monotonic()
+        # A failure in one request must not cancel the others, so collect exceptions and report them per request
+        outcomes = await asyncio.gather(*(make_request_async(session, semaphore, args, headers, emit, i, start_time) for i in range(1, args.requests + 1)),
+                                        return_exceptions=True)
+
+    for request_num, outcome in enumerate(outcomes, start=1):
+        if isinstance(outcome, Exception):
+            print(f"Request {request_num} failed: {describe_error(outcome)}")
+
+def next_pow2(n):
+    return 1 << max(n - 1, 0).bit_length()
+
+def build_raw_request(url, headers):
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+
+    # A user-supplied Host header wins over the URL, e.g. when testing a Worker by IP
+    host = next((value for key, value in headers.items() if key.lower() == "host"), parts.netloc)
+    lines = [f"GET {path} HTTP/1.1", f"Host: {host}"]
+    lines += [f"{key}: {value}" for key, value in headers.items() if key.lower() not in ("host", "connection")]
+    # Every io_uring request owns its socket, so let the server close it after responding
+    lines += ["Connection: close", "", ""]
+    return "\r\n".join(lines).encode()
+
+def decode_chunked(body):
+    decoded = []
+    while body:
+        size_line, _, body = body.partition(b"\r\n")
+        size = int(size_line.split(b";", 1)[0], 16)
+        if size == 0:
+            break
+        decoded.append(body[:size])
+        body = body[size + 2:]
+    return b"".join(decoded)
+
+def parse_raw_response(data):
+    head, _, body = data.partition(b"\r\n\r\n")
+    lines = head.decode("iso-8859-1").split("\r\n")
+    status_code = int(lines[0].split(" ", 2)[1])
+
+    response_headers = CaseInsensitiveDict()
+    for line in lines[1:]:
+        key, _, value = line.partition(":")
+        response_headers[key.strip()] = value.strip()
+
+    if response_headers.get("Transfer-Encoding", "").lower() == "chunked":
+        body = decode_chunked(body)
+
+    return status_code, response_headers, body
+
+def get_uring_sqe(ring):
+    sqe = liburing.io_uring_get_sqe(ring)
+    if sqe is None:
+        # Submission queue is full; flush it and try again
+        liburing.io_uring_submit(ring)
+        sqe = liburing.io_uring_get_sqe(ring)
+    return sqe
+
+def queue_uring_recv(ring, request_num, pending):
+    sqe = get_uring_sqe(ring)
+    liburing.io_uring_prep_recv(sqe, pending["sock"].fileno(), pending["buf"])
+    liburing.io_uring_sqe_set_data64(sqe, request_num * 4 + URING_RECV)
+
+def resolve_uring_addresses(url):
+    # Every resolved address is kept so a request can move on when a connect fails, like requests and aiohttp do
+    parts = urlsplit(url)
+    return [(family, liburing.Sockaddr(family, sockaddr[0], sockaddr[1]))
+            for family, _, _, _, sockaddr in socket.getaddrinfo(parts.hostname, parts.port or 80, type=socket.SOCK_STREAM)]
+
+def queue_uring_chain(ring, request_num, pending):
+    # connect -> send -> recv are linked, so the kernel runs the whole chain without a round trip to Python
+    family, addr = pending["addrs"][pending["addr_index"]]
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    pending["sock"] = sock
+    pending["retry"] = False
+
+    sqe = get_uring_sqe(ring)
+    liburing.io_uring_prep_connect(sqe, sock.fileno(), addr)
+    liburing.io_uring_sqe_set_flags(sqe, liburing.IOSQE_IO_LINK)
+    liburing.io_uring_sqe_set_data64(sqe, request_num * 4 + URING_CONNECT)
+
+    sqe = get_uring_sqe(ring)
+    liburing.io_uring_prep_send(sqe, sock.fileno(), pending["raw_request"])
+    liburing.io_uring_sqe_set_flags(sqe, liburing.IOSQE_IO_LINK)
+    liburing.io_uring_sqe_set_data64(sqe, request_num * 4 + URING_SEND)
+
+    queue_uring_recv(ring, request_num, pending)
+
+def queue_uring_request(ring, request_num, addrs, raw_request, timeout):
+    pending = {
+        "addrs": addrs,
+        "addr_index": 0,
+        "raw_request": raw_request,
+        "buf": bytearray(65536),
+        "chunks": [],
+        "error": None,
+        "start_ns": time.perf_counter_ns(),
+        "deadline": time.monotonic() + timeout
+    }
+    queue_uring_chain(ring, request_num, pending)
+    return pending
+
+def cancel_expired_uring_requests(ring, in_flight):
+    now = time.monotonic()
+    for request_num, pending in in_flight.items():
+        if pending["error"] is None and now >= pending["deadline"]:
+            pending["error"] = "timed out"
+            sqe = get_uring_sqe(ring)
+            liburing.io_uring_prep_cancel_fd(sqe, pending["sock"].fileno(), liburing.IORING_ASYNC_CANCEL_ALL)
+            liburing.io_uring_sqe_set_data64(sqe, request_num * 4 + URING_CANCEL)
+
+def uring_result(entry):
+    # liburing raises negative CQE results as OSError; turn them back into -errno
+    try:
+        return entry.res
+    except OSError as e:
+        return -e.errno
+
+def handle_uring_completion(args, emit, ring, in_flight, user_data, res):
+    request_num, op = divmod(user_data, 4)
+    pending = in_flight.get(request_num)
+    if pending is None or op == URING_CANCEL:
+        return
+
+    if res < 0 and not pending["retry"]:
+        if op == URING_CONNECT and pending["error"] is None and pending["addr_index"] + 1 < len(pending["addrs"]):
+            # Try the next resolved address once the cancelled send and recv have completed
+            pending["retry"] = True
+        else:
+            pending["error"] = pending["error"] or os.strerror(-res)
+    if op != URING_RECV:
+        # A failed connect or send cancels the linked recv, which finishes (or retries) the request
+        return
+    if pending["retry"] and pending["error"] is None:
+        pending["sock"].close()
+        pending["addr_index"] += 1
+        queue_uring_chain(ring, request_num, pending)
+        return
+    if res > 0 and pending["error"] is None:
+        pending["chunks"].append(bytes(pending["buf"][:res]))
+        queue_uring_recv(ring, request_num, pending)
+        return
+    # Otherwise the request is finished: EOF, a recv error, or data that raced a timeout cancel.
+    # A timed-out request is never re-armed, since its cancel has already been spent.
+
+    del in_flight[request_num]
+    pending["sock"].close()
+    response_time = (time.perf_counter_ns() - pending["start_ns"]) / 1_000_000  # Convert to milliseconds
+
+    if pending["error"]:
+        print(f"Request {request_num} failed: {pending['error']}")
+        return
+
+    try:
+        status_code, response_headers, body = parse_raw_response(b"".join(pending["chunks"]))
+    except (ValueError, IndexError):
+        print(f"Request {request_num} failed: malformed HTTP response")
+        return
+
+    record_result(emit, request_num, status_code, response_headers, response_time)
+
+    if args.verbose:
+        display_verbose(request_num, response_headers, body)
+
+def run_io_uring(args, headers, emit, addrs):
+    raw_request = build_raw_request(args.url, headers)
+
+    ring = liburing.Ring()
+    cqe = liburing.Cqe()
+    # A new request takes three SQEs, and a full window of new requests goes out in one submit
+    liburing.io_uring_queue_init(next_pow2(args.concurrency * 3), ring, liburing.IORING_SETUP_SQPOLL if args.sqpoll else 0)
+
+    in_flight = {}
+    next_request = 1
+    start_time = time.monotonic()
+
+    try:
+        while next_request <= args.requests or in_flight:
+            now = time.monotonic()
+            while next_request <= args.requests and len(in_flight) < args.concurrency and now >= scheduled_start(start_time, args, next_request):
+                in_flight[next_request] = queue_uring_request(ring, next_request, addrs, raw_request, args.timeout)
+                next_request += 1
+
+            # New chains and re-armed recvs from the previous round all go out in a single submit
+            liburing.io_uring_submit(ring)
+
+            wake_times = [pending["deadline"] for pending in in_flight.values()]
+            if next_request <= args.requests and len(in_flight) < args.concurrency:
+                wake_times.append(scheduled_start(start_time, args, next_request))
+            if not in_flight:
+                time.sleep(max(min(wake_times) - time.monotonic(), 0))
+                continue
+
+            try:
+                liburing.io_uring_wait_cqe_timeout(ring, cqe, liburing.timespec(max(min(wake_times) - time.monotonic(), 0.001)))
+            except OSError as e:
+                if e.errno != errno.ETIME:
+                    raise
+            else:
+                # Reap everything that has completed before going back to submit
+                while True:
+                    entry = cqe[0]
+                    user_data, res = entry.user_data, uring_result(entry)
+                    liburing.io_uring_cqe_seen(ring, entry)
+                    try:
+                        handle_uring_completion(args, emit, ring, in_flight, user_data, res)
+                    except Exception as e:
+                        # Keep a failure confined to its own request, like the recv error path does
+                        request_num = user_data // 4
+                        pending = in_flight.pop(request_num, None)
+                        if pending is not None:
+                            pending["sock"].close()
+                        print(f"Request {request_num} failed: {describe_error(e)}")
+                    if not liburing.io_uring_cq_ready(ring):
+                        break
+                    liburing.io_uring_peek_cqe(ring, cqe)
+
+            cancel_expired_uring_requests(ring, in_flight)
+    finally:
+        liburing.io_uring_queue_exit(ring)
+        for pending in in_flight.values():
+            pending["sock"].close()
+
+def load_json(content):
+    return orjson.loads(content) if orjson is not None else json.loads(content)
+
+def dump_json(data, f):
+    # orjson serializes straight to bytes on the underlying buffer; the stdlib fallback
+    # streams chunks to the file instead of building the whole document as one string
+    if orjson is not None:
+        f.flush()
+        f.buffer.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        json.dump(data, f, indent=2)
+
 def write_json_file(data, filename):
     with open(filename, 'w') as f:
-        json.dump(data, f, indent=2)
+        dump_json(data, f)
     print(f"\n{Fore.BLUE}Results saved to JSON file: {filename}{Style.RESET_ALL}")
 
 def write_csv_file(data, filename):
@@ -250,40 +645,73 @@ def write_csv_file(data, filename):
     print(f"\n{Fore.BLUE}Results saved to CSV file: {filename}{Style.RESET_ALL}")
 
 def main():
+    global results, response_times, status_codes
+
     args = parse_arguments()
 
     if args.help_tags:
         display_tag_help()
         sys.exit(0)
 
-    headers = {"Accept": "application/json"}
+    headers = {"Accept": "application/json", "Connection": "keep-alive"}
     if args.headers:
         for header in args.headers:
             key, value = header.split(":", 1)
             headers[key.strip()] = value.strip()
 
+    # Settings resolved from the arguments are kept in locals; args stays as parsed
+    defer_output = args.format == "table" if args.defer_output is None else args.defer_output
+    emit = select_emitter(args.format, defer_output)
+
+    backend = args.backend
+    if backend == "asyncio" and aiohttp is None:
+        print(f"{Fore.RED}The asyncio backend requires the aiohttp package (pip install aiohttp), or use --backend threads{Style.RESET_ALL}")
+        sys.exit(1)
+    if backend == "io_uring":
+        if liburing is None:
+            print(f"{Fore.RED}The io_uring backend requires the liburing package (pip install liburing){Style.RESET_ALL}")
+            sys.exit(1)
+        if urlsplit(args.url).scheme != "http":
+            # io_uring requests are written as raw plaintext HTTP; TLS goes through requests instead
+            print(f"{Fore.YELLOW}io_uring backend only supports plain HTTP, falling back to threads{Style.RESET_ALL}")
+            backend = "threads"
+        elif args.follow_redirects:
+            # Raw io_uring requests never follow Location headers
+            print(f"{Fore.YELLOW}io_uring backend does not follow redirects, falling back to threads{Style.RESET_ALL}")
+            backend = "threads"
+
+    if backend == "io_uring":
+        try:
+            addrs = resolve_uring_addresses(args.url)
+        except socket.gaierror as e:
+            print(f"{Fore.RED}Could not resolve {urlsplit(args.url).hostname}: {e}{Style.RESET_ALL}")
+            sys.exit(1)
+
     print(f"{Fore.YELLOW}Rate Limiter Test Results for {args.url}")
     print(f"Requests: {args.requests}, Delay: {args.delay} seconds, Concurrency: {args.concurrency}{Style.RESET_ALL}")
 
-    if args.format == "table":
-        print("| Request | Status | Limit | Remain | Reset Time           | Period | Retry | Response |")
-        print("|---------|--------|-------|--------|---------------------|--------|-------|----------|")
+    if args.format == "table" and not defer_output:
+        sys.stdout.write(TABLE_HEADER)
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=args.concurrency) as executor:
-        futures = []
-        for i in range(1, args.requests + 1):
-            futures.append(executor.submit(make_request, args, headers, i))
-            if args.delay > 0:
-                time.sleep(args.delay)
+    results = [None] * args.requests
+    response_times = np.empty(args.requests, dtype=np.float64)
+    status_codes = np.full(args.requests, -1, dtype=np.int32)
 
-        concurrent.futures.wait(futures)
+    if backend == "io_uring":
+        run_io_uring(args, headers, emit, addrs)
+    elif backend == "asyncio":
+        asyncio.run(run_all(args, headers, emit))
+    else:
+        run_threaded(args, headers, emit)
 
-    results.sort(key=lambda x: x["request_num"])
+    json_output = [result for result in results if result is not None]  # Slots are already in request order
 
-    json_output = results  # No need for conversion, as the results are already in the correct format
+    if defer_output and args.format != "json":
+        display_results(args, json_output)
 
     if args.format == "json":
-        print(json.dumps(json_output, indent=2))
+        dump_json(json_output, sys.stdout)
+        print()
 
     if args.json_output:
         write_json_file(json_output, args.json_output)
@@ -291,12 +719,23 @@ def main():
     if args.csv_output:
         write_csv_file(json_output, args.csv_output)
 
-    response_times = [r["response_time"] for r in results]
-    status_codes = [r["status_code"] for r in results]
-
-    percentiles = calculate_statistics(response_times, status_codes)
-    generate_chart(response_times, status_codes)
-    generate_graph(response_times, status_codes, percentiles)
+    completed = status_codes >= 0
+    times = response_times[completed]
+    codes = status_codes[completed]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        percentiles = calculate_statistics(times, codes)
+        # One pass over the codes gives every count used by the graph and the summary
+        unique_codes, code_counts = np.unique(codes, return_counts=True)
+        # Render the graph in the background while the text chart is drawn;
+        # NumPy binning and the PNG encode release the GIL
+        graph = executor.submit(generate_graph, times, percentiles, unique_codes, code_counts) if args.graph else None
+        generate_chart(times, codes)
+        if graph is not None:
+            graph.result()
+            print(f"\n{Fore.BLUE}Graph saved as rate_limit_test_results.png{Style.RESET_ALL}")
+
+    display_summary(times, codes, unique_codes, code_counts)
 
     print(f"\n{Fore.GREEN}Test completed.{Style.RESET_ALL}")
 